@@ -1,7 +1,7 @@
 from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
-from chatbot import respond
+from chatbot import respond, find_recipe_row, update_user_profile, remove_from_user_profile
 import os
 import json
 import pickle
@@ -52,6 +52,58 @@ collections = load_or_create_db(COLLECTIONS_DB_FILE)
 ratings = load_or_create_db(RATINGS_DB_FILE)
 meal_plans = load_or_create_db(MEAL_PLANS_DB_FILE)
 
+# Ratings at or above this value count towards a user's taste profile
+HIGH_RATING_THRESHOLD = 4
+
+def is_high_rating(rating):
+    try:
+        return float(rating) >= HIGH_RATING_THRESHOLD
+    except (TypeError, ValueError):
+        return False
+
+# Find the dataset row a rated or collected recipe refers to, by row index or recipe name
+def find_liked_recipe(recipe_id):
+    recipe = find_recipe_row(recipe_id)
+    stored_recipe = recipes.get(recipe_id)
+    if recipe is None and isinstance(stored_recipe, dict):
+        recipe = find_recipe_row(stored_recipe.get('TranslatedRecipeName') or stored_recipe.get('name'))
+    return recipe
+
+def is_in_user_collection(user_id, recipe_id):
+    return any(c['user_id'] == user_id and str(recipe_id) in map(str, c['recipes']) for c in collections.values())
+
+# Keep a recipe in the user's taste profile only while it is highly rated or collected
+def refresh_user_profile(user_id, recipe_id, liked):
+    recipe = find_liked_recipe(recipe_id)
+    if recipe is None:
+        return
+    if liked or is_in_user_collection(user_id, recipe_id):
+        update_user_profile(user_id, recipe)
+    else:
+        remove_from_user_profile(user_id, recipe)
+
+# Seed cached taste profiles from each recipe's latest rating and saved collections
+def build_user_profiles():
+    latest_ratings = {}
+    for rating_data in ratings.values():
+        key = (rating_data['user_id'], rating_data['recipe_id'])
+        if key not in latest_ratings or rating_data.get('timestamp', '') >= latest_ratings[key].get('timestamp', ''):
+            latest_ratings[key] = rating_data
+    for (user_id, recipe_id), rating_data in latest_ratings.items():
+        recipe = find_liked_recipe(recipe_id)
+        if recipe is not None and is_high_rating(rating_data['rating']):
+            update_user_profile(user_id, recipe)
+    for collection in collections.values():
+        for recipe_id in collection['recipes']:
+            recipe = find_liked_recipe(recipe_id)
+            if recipe is not None:
+                update_user_profile(collection['user_id'], recipe)
+
+try:
+    build_user_profiles()
+except Exception as e:
+    print(f"Error building user profiles: {str(e)}")
+
 # User class for Flask-Login
 class User(UserMixin):
     def __init__(self, id, username, email):
@@ -230,6 +282,9 @@ def rate_recipe():
     }
     save_db(ratings, RATINGS_DB_FILE)
     
+    # Update the user's taste profile using this latest rating
+    refresh_user_profile(current_user.id, recipe_id, is_high_rating(rating))
+    
     return jsonify({'success': True})
 
 @app.route('/collections')
@@ -280,6 +335,10 @@ def add_to_collection():
     if recipe_id not in collection['recipes']:
         collection['recipes'].append(recipe_id)
         save_db(collections, COLLECTIONS_DB_FILE)
+        # Update the user's taste profile with the collected recipe
+        recipe = find_liked_recipe(recipe_id)
+        if recipe is not None:
+            update_user_profile(current_user.id, recipe)
         flash('Recipe added to collection', 'success')
     
     return redirect(request.referrer)
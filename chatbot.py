@@ -47,6 +47,58 @@ except Exception as e:
         'TranslatedInstructions': ['Step 1. Mix ingredients. Step 2. Cook.'],
         'Cleaned-Ingredients': ['ingredient1, ingredient2, ingredient3']
     })
+# Key ingredients used to validate input and to prioritize exact matches
+KEY_INGREDIENTS = ['chicken', 'paneer', 'mutton', 'lamb', 'fish', 'prawn', 'shrimp', 'potato', 'aloo', 'gobi', 'cauliflower', 'palak', 'spinach', 'chana', 'chickpea', 'rajma', 'bean', 'mushroom', 'rice', 'dal', 'lentil', 'tomato', 'onion', 'garlic', 'ginger', 'curry', 'masala', 'spice']
+class KeywordMatcher:
+    """Aho-Corasick automaton that finds every keyword occurring in a text in one pass"""
+    def __init__(self, keywords):
+        # Trie transitions, failure links and keywords ending at each state
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [set()]
+        for keyword in keywords:
+            state = 0
+            for char in keyword:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(set())
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.output[state].add(keyword)
+        # Breadth-first pass to build failure links
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                if state:
+                    self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] |= self.output[self.fail[next_state]]
+    def find_all(self, text):
+        """Return the set of keywords that occur anywhere in the text"""
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            if self.output[state]:
+                found |= self.output[state]
+        return found
+key_ingredient_matcher = KeywordMatcher(KEY_INGREDIENTS)
+def get_recipe_ingredient_text(recipe):
+    """Get the lowercase ingredient text used for matching a recipe"""
+    cleaned_ing = str(recipe.get('Cleaned-Ingredients', ''))
+    translated_ing = str(recipe.get('TranslatedIngredients', ''))
+    return cleaned_ing.lower() if cleaned_ing else translated_ing.lower()
+# Precompute the key ingredients present in each recipe so boosts are set intersections
+recipe_key_ingredients = {idx: key_ingredient_matcher.find_all(get_recipe_ingredient_text(row)) for idx, row in df.iterrows()}
+def count_primary_matches(primary_key_sets, recipe_keys):
+    """Count the primary ingredients whose key ingredients appear in the recipe"""
+    return sum(1 for keys in primary_key_sets if keys & recipe_keys)
 # Manual implementation of cosine similarity to avoid scipy dependency issues
 def manual_cosine_similarity(vec_a, vec_b):
     """Calculate cosine similarity between two vectors without using scipy"""
@@ -89,7 +141,68 @@ def get_ingredient_vector(ingredient_words):
     if vectors:
         return np.mean(vectors, axis=0)
     return None
-def get_recipes_by_ingredients(ingredients):
+# Cached per-user taste profiles in the Word2Vec space
+user_profiles = {}
+PROFILE_WEIGHT = 0.2
+RERANK_CANDIDATES = 20
+# Map recipe names to dataset rows so rated and collected recipes can be found
+recipe_name_index = {}
+for idx, name in df['TranslatedRecipeName'].items():
+    recipe_name_index.setdefault(str(name).strip().lower(), idx)
+def find_recipe_row(recipe_ref):
+    """Find the dataset row for a recipe given its row index or recipe name"""
+    if recipe_ref is None:
+        return None
+    recipe_ref = str(recipe_ref).strip()
+    if recipe_ref.isdigit() and int(recipe_ref) in df.index:
+        return df.loc[int(recipe_ref)]
+    idx = recipe_name_index.get(recipe_ref.lower())
+    return df.loc[idx] if idx is not None else None
+def get_recipe_vector(recipe):
+    """Get the vector representation of a recipe's cleaned ingredients"""
+    if not w2v_model:
+        return None
+    cleaned_ing = str(recipe.get('Cleaned-Ingredients', ''))
+    if not cleaned_ing:
+        return None
+    return get_ingredient_vector(word_tokenize(cleaned_ing.lower()))
+def refresh_profile_vector(profile):
+    """Store the normalized sum of the profile's recipe vectors so re-ranking only needs a dot product"""
+    magnitude = np.linalg.norm(profile["total"]) if profile["recipes"] else 0
+    profile["vector"] = profile["total"] / magnitude if magnitude else None
+def update_user_profile(user_id, recipe):
+    """Add a liked dataset recipe to the user's taste profile if it is not already part of it"""
+    recipe_id = recipe.name
+    profile = user_profiles.get(user_id)
+    if profile and recipe_id in profile["recipes"]:
+        return
+    recipe_vector = get_recipe_vector(recipe)
+    if recipe_vector is None:
+        return
+    if not profile:
+        profile = user_profiles[user_id] = {"total": np.zeros_like(recipe_vector), "recipes": {}, "vector": None}
+    profile["recipes"][recipe_id] = recipe_vector
+    profile["total"] += recipe_vector
+    refresh_profile_vector(profile)
+def remove_from_user_profile(user_id, recipe):
+    """Remove a dataset recipe the user no longer likes from their taste profile"""
+    recipe_id = recipe.name
+    profile = user_profiles.get(user_id)
+    if not profile or recipe_id not in profile["recipes"]:
+        return
+    profile["total"] -= profile["recipes"].pop(recipe_id)
+    refresh_profile_vector(profile)
+def rerank_by_profile(recipe_scores, profile_vector):
+    """Blend the user's taste profile into the scores of the top candidates"""
+    candidates = recipe_scores[:RERANK_CANDIDATES]
+    candidate_matrix = np.array([vector for idx, score, vector in candidates])
+    magnitudes = np.linalg.norm(candidate_matrix, axis=1)
+    magnitudes[magnitudes == 0] = 1
+    affinities = candidate_matrix.dot(profile_vector) / magnitudes
+    reranked = [(idx, score + PROFILE_WEIGHT * affinity, vector) for (idx, score, vector), affinity in zip(candidates, affinities)]
+    reranked.sort(key=lambda x: x[1], reverse=True)
+    return reranked
+def get_recipes_by_ingredients(ingredients, user_id=None):
     """Find recipes that match the given ingredients using Word2Vec or scoring-based approach"""
     if not ingredients or not isinstance(ingredients, str):
         # Return random recipes if no ingredients provided or input is invalid
@@ -104,17 +217,14 @@ def get_recipes_by_ingredients(ingredients):
     if not valid_ingredients:
         return pd.DataFrame()
     
-    # Key ingredients to prioritize exact matches
-    key_ingredients = ['chicken', 'paneer', 'mutton', 'lamb', 'fish', 'prawn', 'shrimp', 'potato', 'aloo', 'gobi', 'cauliflower', 'palak', 'spinach', 'chana', 'chickpea', 'rajma', 'bean', 'mushroom', 'rice', 'dal', 'lentil', 'tomato', 'onion', 'garlic', 'ginger', 'curry', 'masala', 'spice']
+    # Find the key ingredients contained in each user ingredient
+    primary_key_sets = [key_ingredient_matcher.find_all(ing) for ing in valid_ingredients]
+    primary_key_sets = [keys for keys in primary_key_sets if keys]
     
     # Check if any of the ingredients are valid food items
-    has_valid_food = any(any(key in ing for key in key_ingredients) for ing in valid_ingredients)
-    if not has_valid_food:
+    if not primary_key_sets:
         return pd.DataFrame()
     
-    # Check for presence of key ingredients in user input
-    primary_ingredients = [ing for ing in valid_ingredients if any(key in ing for key in key_ingredients)]
-    
     # Try using Word2Vec approach if available
     if WORD2VEC_AVAILABLE and w2v_model:
         try:
@@ -126,53 +236,46 @@ def get_recipes_by_ingredients(ingredients):
             
             # Fall back to scoring approach if vector creation fails
             if user_vector is None:
-                return get_recipes_by_scoring(ingredient_list, primary_ingredients)
+                return get_recipes_by_scoring(ingredient_list, primary_key_sets)
             
             # Calculate similarity for each recipe
             recipe_scores = []
             for idx, row in df.iterrows():
                 try:
-                    cleaned_ing = str(row.get('Cleaned-Ingredients', ''))
-                    if not cleaned_ing:
-                        continue
                     # Get recipe vector and calculate similarity
-                    recipe_ing_words = word_tokenize(cleaned_ing.lower())
-                    recipe_vector = get_ingredient_vector(recipe_ing_words)
+                    recipe_vector = get_recipe_vector(row)
                     if recipe_vector is None:
                         continue
                     similarity = manual_cosine_similarity(user_vector, recipe_vector)
                     # Boost score for primary ingredients
-                    for p_ing in primary_ingredients:
-                        if p_ing in cleaned_ing.lower():
-                            similarity += 0.3
-                    recipe_scores.append((idx, similarity))
+                    similarity += 0.3 * count_primary_matches(primary_key_sets, recipe_key_ingredients.get(idx, set()))
+                    recipe_scores.append((idx, similarity, recipe_vector))
                 except Exception:
                     continue
             
             # Sort and get top recipes
             recipe_scores.sort(key=lambda x: x[1], reverse=True)
-            top_indices = [idx for idx, score in recipe_scores[:2]]
+            # Re-rank the top candidates using the user's taste profile
+            profile = user_profiles.get(user_id)
+            if profile and profile["vector"] is not None and recipe_scores:
+                recipe_scores = rerank_by_profile(recipe_scores, profile["vector"])
+            top_indices = [idx for idx, score, vector in recipe_scores[:2]]
             if top_indices:
                 return df.iloc[top_indices]
         except Exception:
             pass
     
     # Fall back to scoring approach
-    return get_recipes_by_scoring(ingredient_list, primary_ingredients)
-def get_recipes_by_scoring(ingredient_list, primary_ingredients):
+    return get_recipes_by_scoring(ingredient_list, primary_key_sets)
+def get_recipes_by_scoring(ingredient_list, primary_key_sets):
     """Fallback method for ingredient matching using a scoring system"""
     recipe_scores = []
     # Score each recipe based on ingredient matches
     for idx, row in df.iterrows():
         try:
-            cleaned_ing = str(row.get('Cleaned-Ingredients', ''))
-            translated_ing = str(row.get('TranslatedIngredients', ''))
-            recipe_ingredients = cleaned_ing.lower() if cleaned_ing else translated_ing.lower()
-            score = 0
+            recipe_ingredients = get_recipe_ingredient_text(row)
             # Higher score for primary ingredient matches
-            for p_ing in primary_ingredients:
-                if p_ing in recipe_ingredients:
-                    score += 10
+            score = 10 * count_primary_matches(primary_key_sets, recipe_key_ingredients.get(idx, set()))
             # Score regular ingredient matches
             for ing in ingredient_list:
                 if ing in recipe_ingredients:
@@ -256,8 +359,7 @@ def respond(user_id, user_message):
                 return {"response": "I need valid ingredients to suggest recipes. Please provide ingredients that are at least 3 letters long, separated by commas (like 'rice, tomato, onion').", "has_follow_up": False}
             
             # Check if the ingredients contain any valid food items
-            key_ingredients = ['chicken', 'paneer', 'mutton', 'lamb', 'fish', 'prawn', 'shrimp', 'potato', 'aloo', 'gobi', 'cauliflower', 'palak', 'spinach', 'chana', 'chickpea', 'rajma', 'bean', 'mushroom', 'rice', 'dal', 'lentil', 'tomato', 'onion', 'garlic', 'ginger', 'curry', 'masala', 'spice']
-            has_valid_food = any(any(key in ing for key in key_ingredients) for ing in user_message_clean.split(','))
+            has_valid_food = bool(key_ingredient_matcher.find_all(user_message_clean))
             if not has_valid_food:
                 return {"response": "I couldn't find any valid food ingredients in your input. Please provide actual food ingredients like 'rice', 'chicken', 'tomato', etc.", "has_follow_up": False}
         
@@ -275,7 +377,7 @@ def respond(user_id, user_message):
             else:
                 if len(user_message_clean) < 3 or all(len(ing.strip()) < 3 for ing in user_message_clean.split(',')):
                     return {"response": "I need valid ingredients to suggest recipes. Please provide ingredients that are at least 3 letters long, separated by commas (like 'rice, tomato, onion').", "has_follow_up": False}
-                recipes = get_recipes_by_ingredients(user_message_clean)
+                recipes = get_recipes_by_ingredients(user_message_clean, user_id)
                 response = format_translated_recipe(recipes)
                 if not recipes.empty:
                     session["stage"] = "ask_try_different"
@@ -291,7 +393,7 @@ def respond(user_id, user_message):
             # Validate ingredient input
             if len(potential_ingredients) < 3 or all(len(ing.strip()) < 3 for ing in potential_ingredients.split(',')):
                 return {"response": "I need valid ingredients to suggest recipes. Please provide ingredients that are at least 3 letters long, separated by commas (like 'rice, tomato, onion').", "has_follow_up": False}
-            recipes = get_recipes_by_ingredients(potential_ingredients)
+            recipes = get_recipes_by_ingredients(potential_ingredients, user_id)
             response = format_translated_recipe(recipes)
             if not recipes.empty:
                 session["stage"] = "ask_try_different"
@@ -309,7 +411,7 @@ def respond(user_id, user_message):
         # Default: treat as ingredient list
         if len(user_message_clean) < 3 or all(len(ing.strip()) < 3 for ing in user_message_clean.split(',')):
             return {"response": "I need valid ingredients to suggest recipes. Please provide ingredients that are at least 3 letters long, separated by commas (like 'rice, tomato, onion').", "has_follow_up": False}
-        recipes = get_recipes_by_ingredients(user_message_clean)
+        recipes = get_recipes_by_ingredients(user_message_clean, user_id)
         response = format_translated_recipe(recipes)
         if not recipes.empty:
             session["stage"] = "ask_try_different"